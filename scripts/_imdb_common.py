@@ -0,0 +1,457 @@
+import aiohttp
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import logging
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
+from queue import Empty, Queue
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+import os
+
+# IMDb endpoints queried directly over HTTP
+SEARCH_URL = "https://v2.sg.media-imdb.com/suggestion/{prefix}/{query}.json"
+TITLE_URL = "https://www.imdb.com/title/{imdb_id}/"
+HEADERS = {'User-Agent': 'Mozilla/5.0', 'Accept-Language': 'en-US,en;q=0.9'}
+RATING_PATTERN = re.compile(r'"aggregateRating":\{[^}]*?"ratingValue":\s*([\d.]+)')
+
+# Ratings cache persisted across runs, keyed by normalized title
+CACHE_FILE = 'imdb_cache.db'
+MISS_TTL = 7 * 24 * 60 * 60  # Seconds before a cached "no rating found" is fetched again
+
+# Set up by open_lookup_resources() only while ratings are being fetched
+parse_pool = None  # Worker processes for decoding and parsing title pages off the event loop
+cache_conn = None
+
+def open_lookup_resources():
+    """
+    Start the page-parsing worker pool and open the ratings cache for a run.
+    Pair every call with close_lookup_resources().
+    """
+    global parse_pool, cache_conn
+    parse_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    cache_conn = sqlite3.connect(CACHE_FILE)
+    cache_conn.execute('CREATE TABLE IF NOT EXISTS cache (title TEXT PRIMARY KEY, rating REAL, fetched_at INTEGER)')
+
+def close_lookup_resources():
+    """
+    Shut down the page-parsing worker pool and close the ratings cache.
+    """
+    global parse_pool, cache_conn
+    parse_pool.shutdown()
+    cache_conn.close()
+    cached_rating.cache_clear()
+    parse_pool = None
+    cache_conn = None
+
+def normalize_title(title):
+    """
+    Build the lookup key for a title so that spelling variants share one request.
+    
+    Parameters:
+    - title: str, the title of the movie/show
+    
+    Returns:
+    - key: str, lowercased title with surrounding whitespace removed
+    """
+    if not isinstance(title, str):
+        return ''
+    return title.strip().lower()
+
+def normalize_titles(titles):
+    """
+    Vectorized normalize_title for a whole column of titles.
+    
+    Parameters:
+    - titles: pd.Series, movie/show titles
+    
+    Returns:
+    - keys: pd.Series, lowercased titles with surrounding whitespace removed ('' if missing)
+    """
+    return titles.str.strip().str.lower().fillna('')
+
+def read_titles(input_file):
+    """
+    Read only the title column of a CSV file, always as text so that a title like 1917
+    is not parsed as a number.
+    
+    Parameters:
+    - input_file: str, path to the input CSV file
+    
+    Returns:
+    - titles: pd.Series, movie/show titles (None where missing)
+    """
+    convert_options = pacsv.ConvertOptions(
+        include_columns=['title'], column_types={'title': pa.string()}, strings_can_be_null=True,
+    )
+    return pacsv.read_csv(input_file, convert_options=convert_options).column('title').to_pandas()
+
+@functools.lru_cache(maxsize=10000)
+def cached_rating(key):
+    """
+    Look up a previously fetched rating in the on-disk cache.
+    
+    Parameters:
+    - key: str, normalized title
+    
+    Returns:
+    - rating: float, cached IMDb rating (None if the title was not found on IMDb)
+    
+    Raises:
+    - KeyError: if the title has not been fetched yet, or its cached miss is older
+      than MISS_TTL (misses are not memoized)
+    """
+    row = cache_conn.execute('SELECT rating, fetched_at FROM cache WHERE title=?', (key,)).fetchone()
+    if row is None:
+        raise KeyError(key)
+    rating, fetched_at = row
+    if rating is None and time.time() - fetched_at > MISS_TTL:
+        raise KeyError(key)
+    return rating
+
+def store_rating(key, rating):
+    """
+    Record a fetched rating in the on-disk cache. Call cache_conn.commit() to persist it.
+    
+    Parameters:
+    - key: str, normalized title
+    - rating: float, IMDb rating or None if not found
+    """
+    cache_conn.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)', (key, rating, int(time.time())))
+
+def parse_rating(page):
+    """
+    Extract the rating from the raw bytes of an IMDb title page.
+    
+    Parameters:
+    - page: bytes, body of the title page
+    
+    Returns:
+    - rating: float, IMDb rating of the movie or None if the page has none
+    """
+    match = RATING_PATTERN.search(page.decode('utf-8', errors='replace'))
+    return float(match.group(1)) if match else None
+
+def make_session():
+    """
+    Create the HTTP session shared by all lookups. Connections are kept alive and
+    pooled per host, so the TLS handshake with each IMDb host is paid once rather than per request.
+    
+    Returns:
+    - session: aiohttp.ClientSession
+    """
+    connector = aiohttp.TCPConnector(limit=64, limit_per_host=32, keepalive_timeout=30, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=10))
+
+def raise_for_non_200(response):
+    """
+    Treat any status other than 200 as a failed request, so that interstitial pages
+    (e.g. a 202 bot check) are retried and never cached as "no rating found".
+    
+    Parameters:
+    - response: aiohttp.ClientResponse
+    
+    Raises:
+    - aiohttp.ClientResponseError: if the status is not 200
+    """
+    if response.status != 200:
+        raise aiohttp.ClientResponseError(
+            response.request_info, response.history,
+            status=response.status, message=response.reason or '', headers=response.headers,
+        )
+
+async def fetch_rating(session, title):
+    """
+    Search IMDb for a title and read the rating of the first match from its title page.
+    
+    Parameters:
+    - session: aiohttp.ClientSession, shared HTTP session
+    - title: str, the title of the movie/show
+    
+    Returns:
+    - rating: float, IMDb rating of the movie or None if not found
+    """
+    if not isinstance(title, str) or not title.strip():
+        return None
+    query = title.strip()
+    prefix = query[0].lower() if query[0].isalnum() else 'x'
+    
+    search_url = SEARCH_URL.format(prefix=prefix, query=quote(query, safe=''))
+    async with session.get(search_url) as response:
+        raise_for_non_200(response)
+        suggestions = await response.json(content_type=None)
+    matches = [item for item in suggestions.get('d', []) if item.get('id', '').startswith('tt')]
+    if not matches:
+        return None
+    
+    title_url = TITLE_URL.format(imdb_id=matches[0]['id'])
+    async with session.get(title_url) as response:
+        raise_for_non_200(response)
+        page = await response.read()
+    return await asyncio.get_running_loop().run_in_executor(parse_pool, parse_rating, page)
+
+async def get_imdb_rating(session, semaphore, title):
+    """
+    Fetch the IMDb rating for a given movie title with retry logic.
+    
+    Parameters:
+    - session: aiohttp.ClientSession, shared HTTP session
+    - semaphore: asyncio.Semaphore, bounds the number of requests in flight
+    - title: str, the title of the movie/show
+    
+    Returns:
+    - rating: float, IMDb rating of the movie or None if not found
+    """
+    key = normalize_title(title)
+    try:
+        return cached_rating(key)
+    except KeyError:
+        pass
+    
+    retries = 3
+    for attempt in range(retries):
+        try:
+            async with semaphore:
+                rating = await fetch_rating(session, title)
+            store_rating(key, rating)
+            return rating
+        except asyncio.TimeoutError:
+            print(f"Timeout error while fetching rating for: {title}. Retrying...")
+        except aiohttp.ClientResponseError as e:
+            print(f"HTTP error occurred: {e}. Retrying...")
+        except aiohttp.ClientError as e:
+            print(f"Request exception occurred: {e}. Retrying...")
+        except Exception as e:
+            print(f"Unexpected error occurred: {e}. Retrying...")
+        await asyncio.sleep(2 ** attempt)  # Back off before retrying
+    return None
+
+async def fetch_imdb_batch(session, semaphore, titles):
+    """
+    Fetch IMDb ratings for a batch of titles, requesting each distinct title once.
+    
+    Parameters:
+    - session: aiohttp.ClientSession, shared HTTP session
+    - semaphore: asyncio.Semaphore, bounds the number of requests in flight
+    - titles: list of str, movie/show titles
+    
+    Returns:
+    - ratings: dict, normalized title -> IMDb rating (None if not found)
+    """
+    unique_titles = {normalize_title(title): title for title in titles}
+    ratings = await asyncio.gather(*(get_imdb_rating(session, semaphore, title) for title in unique_titles.values()))
+    cache_conn.commit()
+    return dict(zip(unique_titles.keys(), ratings))
+
+def append_progress(progress_file, rows):
+    """
+    Append progress rows to the JSONL log in a single write.
+    
+    Parameters:
+    - progress_file: str, path to the progress JSONL file
+    - rows: list of dict, progress rows with Index, Title and Rating
+    """
+    with open(progress_file, 'ab') as f:
+        f.write(b''.join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows))
+
+def load_progress(progress_file, norm_titles):
+    """
+    Read the progress log, including any CSV log left by earlier versions of the scripts
+    (<input>_progress.csv), so a rerun does not fetch those titles again. Index is the input
+    row number; rows whose logged title does not match the title on that row are dropped,
+    so a log written for other data cannot put ratings on the wrong titles.
+    
+    Parameters:
+    - progress_file: str, path to the progress JSONL file
+    - norm_titles: pd.Series, normalized titles of the input, one per row
+    
+    Returns:
+    - progress_df: DataFrame with Index, Title and Rating, or None if no log exists
+    """
+    logs = []
+    legacy_file = progress_file.replace('_progress.jsonl', '_progress.csv')
+    if os.path.exists(legacy_file):
+        convert_options = pacsv.ConvertOptions(column_types={'Title': pa.string()}, strings_can_be_null=True)
+        logs.append(pacsv.read_csv(legacy_file, convert_options=convert_options).to_pandas())
+    if os.path.exists(progress_file):
+        logs.append(pd.read_json(progress_file, lines=True, engine='pyarrow'))
+    if not logs:
+        return None
+    progress_df = pd.concat(logs, ignore_index=True)
+    
+    # Check each logged title against the input row it points at
+    indices = progress_df['Index'].to_numpy(dtype=np.int64)
+    in_range = (indices >= 0) & (indices < len(norm_titles))
+    matches = np.zeros(len(progress_df), dtype=bool)
+    logged_keys = normalize_titles(progress_df['Title'][in_range]).to_numpy()
+    matches[in_range] = logged_keys == norm_titles.to_numpy()[indices[in_range]]
+    if not matches.all():
+        print(f"Ignoring {(~matches).sum()} progress rows that do not match the titles in the input file.")
+    return progress_df[matches]
+
+def writer_loop(progress_queue, progress_file, flush_rows=1000, flush_interval=1.0):
+    """
+    Drain progress rows from the queue and append them to the progress log in large writes.
+    Runs on a single writer thread until None is received, then flushes what is left.
+    
+    Parameters:
+    - progress_queue: queue.Queue, lists of progress rows put by the workers
+    - progress_file: str, path to the progress JSONL file
+    - flush_rows: int, write once this many rows are buffered
+    - flush_interval: float, seconds after which buffered rows are written regardless
+    """
+    buffer = []
+    last_flush = time.time()
+    while True:
+        try:
+            rows = progress_queue.get(timeout=flush_interval)
+        except Empty:
+            rows = []
+        if rows is None:
+            break
+        buffer.extend(rows)
+        if buffer and (len(buffer) >= flush_rows or time.time() - last_flush >= flush_interval):
+            append_progress(progress_file, buffer)
+            buffer = []
+            last_flush = time.time()
+    if buffer:
+        append_progress(progress_file, buffer)
+
+async def process_titles(session, semaphore, titles_arr, indices, progress_queue):
+    """
+    Process a list of titles and fetch IMDb ratings.
+    
+    Parameters:
+    - session: aiohttp.ClientSession, shared HTTP session
+    - semaphore: asyncio.Semaphore, bounds the number of requests in flight
+    - titles_arr: np.ndarray, movie/show titles shared read-only by every batch
+    - indices: np.ndarray of int, positions in titles_arr to process
+    - progress_queue: queue.Queue, receives this batch's progress rows for the writer thread
+    
+    Returns:
+    - indices: np.ndarray of int, the indices that were processed
+    - ratings: list of float, IMDb ratings in the same order as indices
+    """
+    index_list = indices.tolist()  # Plain ints for indexing and for the progress rows
+    titles = [titles_arr[index] for index in index_list]
+    batch_ratings = await fetch_imdb_batch(session, semaphore, titles)
+    ratings = [batch_ratings[normalize_title(title)] for title in titles]
+    progress = [{'Index': index, 'Title': title, 'Rating': rating} for index, title, rating in zip(index_list, titles, ratings)]
+    
+    # Hand the rows to the writer thread instead of touching the file here
+    progress_queue.put(progress)
+    
+    return indices, ratings
+
+def write_rated_csv(input_file, output_file, rating_map, chunk_size=50_000):
+    """
+    Stream the input CSV in chunks, attach IMDb ratings and write the result incrementally,
+    so only chunk_size full-width rows are held in memory at a time.
+    
+    Parameters:
+    - input_file: str, path to the input CSV file
+    - output_file: str, path to the output CSV file
+    - rating_map: dict, normalized title -> IMDb rating
+    - chunk_size: int, number of rows read per chunk
+    """
+    with open(output_file, 'wb') as f:
+        # The pyarrow engine does not support chunksize, so chunks come from the C parser
+        for i, chunk in enumerate(pd.read_csv(input_file, chunksize=chunk_size, dtype={'title': str})):
+            # Ratings have one decimal place, so nullable float32 is precise enough at half the size
+            chunk['IMDB_Rating'] = pd.array(normalize_titles(chunk['title']).map(rating_map), dtype='Float32')
+            # pyarrow's CSV output is not byte-identical to DataFrame.to_csv: it quotes every
+            # string field and header name, and writes whole floats without the ".0"
+            # (2021.0 -> 2021). pandas reads both back to the same values.
+            options = pacsv.WriteOptions(include_header=(i == 0), quoting_style='needed')
+            pacsv.write_csv(pa.Table.from_pandas(chunk, preserve_index=False), f, options)
+
+def run_imdb_ratings(input_file, output_suffix):
+    """
+    Add IMDb ratings to the dataset and save to a new file, resuming from the progress log.
+    
+    Parameters:
+    - input_file: str, path to the input CSV file
+    - output_suffix: str, replaces '.csv' in input_file to name the output file
+    """
+    # Check if the 'title' column exists
+    if 'title' not in pd.read_csv(input_file, nrows=0).columns:
+        print("Error: 'title' column is missing from the input file.")
+        return
+    
+    # Load only the titles; the full-width rows are streamed in chunks when writing the output
+    titles = read_titles(input_file)
+    
+    # Path for progress log
+    progress_file = input_file.replace('.csv', '_progress.jsonl')
+    
+    # Normalize titles once so spelling variants share one lookup;
+    # only the first row of each normalized title is looked up and duplicates reuse its rating
+    norm_titles = normalize_titles(titles)
+    unique_titles = norm_titles.drop_duplicates()
+    
+    # Initialize the ratings array (missing ratings stay NaN)
+    ratings = np.full(len(titles), np.nan)
+    
+    # Load previous progress if exists
+    progress_df = load_progress(progress_file, norm_titles)
+    if progress_df is not None:
+        processed_indices = progress_df['Index'].to_numpy(dtype=np.int64)
+        ratings[processed_indices] = progress_df['Rating'].to_numpy()
+    else:
+        processed_indices = np.array([], dtype=np.int64)
+    
+    # Find unprocessed titles
+    unprocessed_indices = np.setdiff1d(unique_titles.index.to_numpy(dtype=np.int64), processed_indices)
+    
+    # Set up concurrent processing
+    batch_size = 50
+    max_concurrency = 32  # Requests in flight at once
+    num_workers = 8  # Each worker drains its own shard of titles
+    start_time = time.time()  # Track start time for overall process
+    titles_arr = titles.to_numpy()  # Shared read-only by every batch
+    log_every = 100  # Log progress every 100 titles rather than every title
+    completed = 0
+    
+    async def worker(session, semaphore, shard):
+        nonlocal completed
+        for batch_start in range(0, len(shard), batch_size):
+            batch_indices = shard[batch_start: batch_start + batch_size]
+            indices, batch_ratings = await process_titles(session, semaphore, titles_arr, batch_indices, progress_queue)
+            ratings[indices] = np.array(batch_ratings, dtype=np.float64)
+            previous = completed
+            completed += len(indices)
+            if completed // log_every > previous // log_every:
+                elapsed_time = time.time() - start_time
+                logging.info("Processed %d/%d titles. Elapsed time: %.2f seconds.", completed, len(unprocessed_indices), elapsed_time)
+    
+    async def main():
+        semaphore = asyncio.Semaphore(max_concurrency)
+        async with make_session() as session:
+            shards = [unprocessed_indices[i::num_workers] for i in range(num_workers)]
+            await asyncio.gather(*(worker(session, semaphore, shard) for shard in shards))
+    
+    # A single writer thread owns the progress log for the whole run
+    progress_queue = Queue()
+    writer = threading.Thread(target=writer_loop, args=(progress_queue, progress_file), daemon=True)
+    writer.start()
+    open_lookup_resources()
+    try:
+        asyncio.run(main())
+    finally:
+        progress_queue.put(None)
+        writer.join()
+        close_lookup_resources()
+    
+    # Save the rated rows to a new CSV file, spreading each title's rating to its duplicates
+    rating_map = {key: ratings[index] for index, key in unique_titles.items()}
+    output_file = input_file.replace('.csv', output_suffix)
+    write_rated_csv(input_file, output_file, rating_map)
+    total_elapsed_time = time.time() - start_time
+    print(f"Updated data saved to: {output_file}. Total elapsed time: {total_elapsed_time:.2f} seconds.")
@@ -8,14 +8,21 @@ def merge_datasets(x_file, progress_file):
     
     Parameters:
     - x_file: str, path to the x CSV file
-    - progress_file: str, path to the progress CSV file
+    - progress_file: str, path to the progress file (CSV or JSONL)
     
     Returns:
     - merged_df: DataFrame, merged DataFrame
     """
-    # Load the data
-    x_df = pd.read_csv(x_file)
-    progress_df = pd.read_csv(progress_file)
+    # Load the data, reading only the columns needed from the progress file
+    x_df = pd.read_csv(x_file, engine='pyarrow')
+    if progress_file.endswith('.jsonl'):
+        progress_df = pd.read_json(progress_file, lines=True, engine='pyarrow').filter(items=['Title', 'Rating'])
+    else:
+        try:
+            progress_df = pd.read_csv(progress_file, engine='pyarrow', usecols=['Title', 'Rating'])
+        except KeyError:
+            # pyarrow reports columns missing from usecols as a KeyError
+            progress_df = pd.DataFrame()
     
     # Check if the required columns exist
     if 'title' not in x_df.columns:
@@ -29,6 +36,17 @@ def merge_datasets(x_file, progress_file):
     # Rename the 'Rating' column to 'IMDB_Rating' in progress_df
     progress_df.rename(columns={'Rating': 'IMDB_Rating'}, inplace=True)
     
+    # Keep one rating per title so the merge cannot duplicate rows
+    progress_df = progress_df.drop_duplicates(subset='Title')
+    
+    # Join on categorical codes over a shared category set instead of hashing raw strings
+    categories = pd.api.types.union_categoricals([
+        x_df['title'].astype('category'),
+        progress_df['Title'].astype('category'),
+    ]).categories
+    x_df['title'] = pd.Categorical(x_df['title'], categories=categories)
+    progress_df['Title'] = pd.Categorical(progress_df['Title'], categories=categories)
+    
     # Merge the datasets on the title and name columns
     merged_df = pd.merge(x_df, progress_df, left_on='title', right_on='Title', how='left')
     